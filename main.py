@@ -6,6 +6,7 @@ Main script to run the complete analysis
 
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Add src to path
@@ -13,7 +14,6 @@ sys.path.append('src')
 
 from src.data_loader import COVIDDataLoader
 from src.data_processor import COVIDDataProcessor
-from src.visualizations import COVIDVisualizations
 
 def main():
     print("🦠 COVID-19 Data Visualization Project")
@@ -21,15 +21,17 @@ def main():
     
     # Initialize components
     loader = COVIDDataLoader()
-    visualizer = COVIDVisualizations()
     
     # Create output directory
     os.makedirs('output/plots', exist_ok=True)
     
     # Step 1: Download data
     print("\n📥 Step 1: Downloading COVID-19 data...")
-    loader.download_johns_hopkins_data()
-    loader.download_owid_data()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        downloads = loader.download_johns_hopkins_data(executor=executor)
+        downloads += loader.download_owid_data(executor=executor)
+        for future in downloads:
+            future.result()  # Re-raise anything _fetch did not handle
     
     # Step 2: Load data
     print("\n📊 Step 2: Loading datasets...")
@@ -40,6 +42,10 @@ def main():
         print("❌ No datasets loaded. Exiting...")
         return
     
+    # Deferred so runs without data never pay the matplotlib/seaborn import cost
+    from src.visualizations import COVIDVisualizations
+    visualizer = COVIDVisualizations()
+    
     # Step 3: Process data
     print("\n🔄 Step 3: Processing data...")
     processor = COVIDDataProcessor(datasets)
@@ -51,10 +57,7 @@ def main():
     # Calculate additional metrics for available datasets
     for data_type in processed_data:
         if len(processed_data[data_type]) > 0:
-            processed_data[data_type] = processor.calculate_daily_changes(
-                processed_data[data_type], data_type
-            )
-            processed_data[data_type] = processor.calculate_moving_average(
+            processed_data[data_type] = processor.calculate_trend_metrics(
                 processed_data[data_type], data_type
             )
     
@@ -62,9 +65,11 @@ def main():
     print("\n📈 Step 4: Creating visualizations...")
     
     if len(processed_data) > 0:
+        global_by_date = processor.calculate_global_by_date(processed_data)
+        
         # Global trends
         print("Creating global trends visualization...")
-        global_data = processor.create_global_summary(processed_data)
+        global_data = processor.create_global_summary(processed_data, global_by_date)
         visualizer.plot_global_trends(
             global_data, 
             save_path='output/plots/global_trends.png'
@@ -85,7 +90,8 @@ def main():
         visualizer.create_summary_dashboard(
             processed_data,
             owid_data,
-            save_path='output/plots/covid_dashboard.png'
+            save_path='output/plots/covid_dashboard.png',
+            global_by_date=global_by_date
         )
     
     # OWID-specific visualizations
@@ -1,8 +1,27 @@
 import pandas as pd
+import numpy as np
 import requests
 import os
+import filecmp
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = 'pyarrow'
+    HAS_PYARROW = True
+except ImportError:
+    CSV_ENGINE = 'c'
+    HAS_PYARROW = False
+
+# Columns of the OWID dataset used downstream; everything else is skipped at parse time
+OWID_COLUMNS = [
+    'location', 'date', 'total_cases', 'new_cases', 'total_deaths',
+    'new_deaths', 'total_cases_per_million', 'new_cases_per_million',
+    'total_deaths_per_million', 'new_deaths_per_million', 'population',
+    'total_vaccinations', 'people_vaccinated', 'people_fully_vaccinated'
+]
+
 class COVIDDataLoader:
     def __init__(self):
         self.base_urls = {
@@ -10,7 +29,43 @@ class COVIDDataLoader:
             'owid': 'https://raw.githubusercontent.com/owid/covid-19-data/master/public/data/'
         }
         
-    def download_johns_hopkins_data(self, data_dir='data/raw/'):
+    def _stream_to_file(self, url, filepath):
+        """Stream a remote file to disk, replacing filepath only once the body is complete"""
+        part_path = filepath + '.part'
+        try:
+            with requests.get(url, stream=True) as response:
+                response.raise_for_status()
+                with open(part_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=1 << 20):
+                        f.write(chunk)
+            # Leave unchanged files untouched so their Parquet cache stays valid
+            if not (os.path.exists(filepath) and filecmp.cmp(part_path, filepath, shallow=False)):
+                os.replace(part_path, filepath)
+        finally:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+    
+    def _fetch(self, task):
+        """Download a single (label, url, filepath) task and report the result"""
+        label, url, filepath = task
+        try:
+            print(f"Downloading {label} data...")
+            self._stream_to_file(url, filepath)
+            print(f"✓ Downloaded {os.path.basename(filepath)}")
+            
+        except (requests.RequestException, OSError) as e:
+            print(f"✗ Error downloading {os.path.basename(filepath)}: {e}")
+    
+    def _run_downloads(self, tasks, executor=None):
+        """Run download tasks concurrently and return their futures"""
+        if executor is None:
+            # Leaving the block waits for every download to finish
+            with ThreadPoolExecutor(max_workers=4) as ex:
+                return self._run_downloads(tasks, ex)
+        
+        return [executor.submit(self._fetch, task) for task in tasks]
+    
+    def download_johns_hopkins_data(self, data_dir='data/raw/', executor=None):
         """Download COVID-19 data from Johns Hopkins University"""
         files = {
             'confirmed': 'time_series_covid19_confirmed_global.csv',
@@ -20,39 +75,67 @@ class COVIDDataLoader:
         
         os.makedirs(data_dir, exist_ok=True)
         
-        for data_type, filename in files.items():
-            url = self.base_urls['johns_hopkins'] + filename
-            try:
-                print(f"Downloading {data_type} data...")
-                response = requests.get(url)
-                response.raise_for_status()
-                
-                filepath = os.path.join(data_dir, filename)
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(response.text)
-                print(f"✓ Downloaded {filename}")
-                
-            except requests.RequestException as e:
-                print(f"✗ Error downloading {filename}: {e}")
-
-                continue
+        tasks = [
+            (data_type, self.base_urls['johns_hopkins'] + filename, os.path.join(data_dir, filename))
+            for data_type, filename in files.items()
+        ]
+        return self._run_downloads(tasks, executor)
     
-    def download_owid_data(self, data_dir='data/raw/'):
+    def download_owid_data(self, data_dir='data/raw/', executor=None):
         """Download comprehensive COVID-19 data from Our World in Data"""
+        os.makedirs(data_dir, exist_ok=True)
+        
         url = self.base_urls['owid'] + 'owid-covid-data.csv'
         filepath = os.path.join(data_dir, 'owid-covid-data.csv')
+        return self._run_downloads([('OWID comprehensive', url, filepath)], executor)
+    
+    def _prepare_johns_hopkins(self, df):
+        """Drop unused coordinates, store countries as a categorical and counts as int32"""
+        df = df.drop(columns=['Lat', 'Long'], errors='ignore')
+        df['Country/Region'] = df['Country/Region'].astype('category')
         
-        try:
-            print("Downloading OWID comprehensive data...")
-            response = requests.get(url)
-            response.raise_for_status()
-            
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(response.text)
-            print("✓ Downloaded OWID data")
-            
-        except requests.RequestException as e:
-            print(f"✗ Error downloading OWID data: {e}")
+        # Only narrow count columns whose values fit, since astype wraps silently on overflow
+        int32 = np.iinfo(np.int32)
+        int_cols = df.select_dtypes(include='int64').columns
+        fits = (df[int_cols].min() >= int32.min) & (df[int_cols].max() <= int32.max)
+        narrow_cols = int_cols[fits.to_numpy()]
+        df[narrow_cols] = df[narrow_cols].astype('int32')
+        return df
+    
+    def _prepare_owid(self, df):
+        """Store OWID measures as float32; aggregate populations exceed the int32 range"""
+        numeric_cols = df.select_dtypes(include=[np.number]).columns
+        df[numeric_cols] = df[numeric_cols].astype('float32')
+        return df
+    
+    def _read_cached(self, filepath, columns=None, prepare=None, **read_kwargs):
+        """Read a CSV, preferring a Parquet copy written after the CSV last changed"""
+        parquet_path = os.path.splitext(filepath)[0] + '.parquet'
+        
+        if (HAS_PYARROW and os.path.exists(parquet_path) and
+                os.path.getmtime(parquet_path) >= os.path.getmtime(filepath)):
+            try:
+                return pd.read_parquet(parquet_path, engine='pyarrow', columns=columns)
+            except Exception as e:
+                print(f"⚠️  Ignoring unreadable cache {os.path.basename(parquet_path)}: {e}")
+        
+        df = pd.read_csv(filepath, engine=CSV_ENGINE, usecols=columns, **read_kwargs)
+        if prepare is not None:
+            df = prepare(df)
+        
+        if HAS_PYARROW:
+            # Write beside the cache and swap in, so an interrupted write never leaves a bad cache
+            part_path = parquet_path + '.part'
+            try:
+                df.to_parquet(part_path, engine='pyarrow', compression='zstd', index=False)
+                os.replace(part_path, parquet_path)
+            except Exception as e:
+                print(f"⚠️  Could not cache {os.path.basename(parquet_path)}: {e}")
+            finally:
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+        
+        return df
     
     def load_data(self, data_dir='data/raw/'):
         """Load all COVID-19 datasets"""
@@ -69,7 +152,7 @@ class COVIDDataLoader:
             filepath = os.path.join(data_dir, filename)
             if os.path.exists(filepath):
                 try:
-                    datasets[data_type] = pd.read_csv(filepath)
+                    datasets[data_type] = self._read_cached(filepath, prepare=self._prepare_johns_hopkins)
                     print(f"✓ Loaded {data_type} data: {len(datasets[data_type])} rows")
                 except Exception as e:
                     print(f"✗ Error loading {filename}: {e}")
@@ -80,7 +163,12 @@ class COVIDDataLoader:
         owid_filepath = os.path.join(data_dir, 'owid-covid-data.csv')
         if os.path.exists(owid_filepath):
             try:
-                datasets['owid'] = pd.read_csv(owid_filepath)
+                # Project only the wanted columns that this file actually has
+                header = pd.read_csv(owid_filepath, nrows=0).columns
+                owid_cols = [col for col in OWID_COLUMNS if col in header]
+                datasets['owid'] = self._read_cached(owid_filepath, columns=owid_cols,
+                                                     prepare=self._prepare_owid,
+                                                     parse_dates=['date'], date_format='%Y-%m-%d')
                 print(f"✓ Loaded OWID data: {len(datasets['owid'])} rows")
             except Exception as e:
                 print(f"✗ Error loading OWID data: {e}")
@@ -1,6 +1,12 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from src.data_loader import OWID_COLUMNS, HAS_PYARROW
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
 
 class COVIDDataProcessor:
     def __init__(self, datasets):
@@ -14,28 +20,40 @@ class COVIDDataProcessor:
             if data_type not in self.datasets:
                 continue
                 
-            df = self.datasets[data_type].copy()
+            df = self.datasets[data_type]
             
-            # Melt the dataframe to long format
+            # Collapse provinces into countries while still in wide format
             id_vars = ['Province/State', 'Country/Region', 'Lat', 'Long']
-            df_melted = df.melt(id_vars=id_vars, var_name='Date', value_name=data_type)
+            date_cols = [col for col in df.columns if col not in id_vars]
+            wide = df.groupby('Country/Region', sort=False, observed=True)[date_cols].sum(numeric_only=True).astype('int32')
             
-            # Convert date column
-            df_melted['Date'] = pd.to_datetime(df_melted['Date'])
+            # Reshape the much smaller country x date matrix to long format
+            df_country = wide.stack().rename(data_type).reset_index()
+            df_country.columns = ['Country/Region', 'Date', data_type]
             
-            # Group by country and date
-            df_country = df_melted.groupby(['Country/Region', 'Date'])[data_type].sum().reset_index()
+            # Convert date column
+            df_country['Date'] = pd.to_datetime(df_country['Date'], format='%m/%d/%y', cache=True)
             
             processed_data[data_type] = df_country
         
         return processed_data
     
-    def create_global_summary(self, processed_data):
+    def calculate_global_by_date(self, processed_data):
+        """Sum each metric across countries for every date"""
+        return {
+            data_type: df.groupby('Date', sort=True)[data_type].sum()
+            for data_type, df in processed_data.items()
+        }
+    
+    def create_global_summary(self, processed_data, global_by_date=None):
         """Create global summary statistics"""
+        if global_by_date is None:
+            global_by_date = self.calculate_global_by_date(processed_data)
+        
         global_data = []
         
-        for data_type, df in processed_data.items():
-            global_summary = df.groupby('Date')[data_type].sum().reset_index()
+        for data_type in processed_data:
+            global_summary = global_by_date[data_type].reset_index()
             global_summary['Type'] = data_type
             global_data.append(global_summary)
         
@@ -44,21 +62,43 @@ class COVIDDataProcessor:
     def calculate_daily_changes(self, df, value_col):
         """Calculate daily new cases/deaths"""
         df = df.sort_values(['Country/Region', 'Date'])
-        df['Daily_New'] = df.groupby('Country/Region')[value_col].diff().fillna(0)
+        df['Daily_New'] = df.groupby('Country/Region', observed=True)[value_col].diff().fillna(0)
         df['Daily_New'] = df['Daily_New'].clip(lower=0)  # Remove negative values
         return df
     
     def calculate_moving_average(self, df, value_col, window=7):
         """Calculate moving average for smoother trends"""
         df = df.sort_values(['Country/Region', 'Date'])
-        df[f'{value_col}_MA{window}'] = df.groupby('Country/Region')[value_col].rolling(window=window, min_periods=1).mean().reset_index(0, drop=True)
+        df[f'{value_col}_MA{window}'] = df.groupby('Country/Region', sort=False, observed=True)[value_col].transform(
+            lambda s: s.rolling(window=window, min_periods=1).mean()
+        )
         return df
     
+    def calculate_trend_metrics(self, df, value_col, window=7):
+        """Calculate daily changes and moving average in a single pass"""
+        if pl is None or not HAS_PYARROW:
+            df = self.calculate_daily_changes(df, value_col)
+            return self.calculate_moving_average(df, value_col, window)
+        
+        return (
+            pl.from_pandas(df)
+            .lazy()
+            .sort(['Country/Region', 'Date'])
+            .with_columns([
+                pl.col(value_col).diff().over('Country/Region')
+                  .clip(lower_bound=0).fill_null(0).cast(pl.Float64).alias('Daily_New'),
+                pl.col(value_col).rolling_mean(window, min_samples=1)
+                  .over('Country/Region').alias(f'{value_col}_MA{window}')
+            ])
+            .collect()
+            .to_pandas()
+        )
+    
     def get_top_countries(self, df, value_col, n=10, date=None):
         """Get top N countries by specified metric"""
         if date is None:
-            # Use latest date
-            latest_data = df.loc[df.groupby('Country/Region')['Date'].idxmax()]
+            # Use latest date (rows are ordered by country, then date)
+            latest_data = df.groupby('Country/Region', sort=False, observed=True).tail(1)
         else:
             latest_data = df[df['Date'] == date]
         
@@ -69,20 +109,16 @@ class COVIDDataProcessor:
         if 'owid' not in self.datasets:
             return None
             
-        df = self.datasets['owid'].copy()
-        
-        # Convert date column
-        df['date'] = pd.to_datetime(df['date'])
+        df = self.datasets['owid']
         
-        # Select relevant columns
-        relevant_cols = [
-            'location', 'date', 'total_cases', 'new_cases', 'total_deaths', 
-            'new_deaths', 'total_cases_per_million', 'new_cases_per_million',
-            'total_deaths_per_million', 'new_deaths_per_million', 'population',
-            'total_vaccinations', 'people_vaccinated', 'people_fully_vaccinated'
-        ]
+        # Select relevant columns (already projected by the loader, so this stays narrow)
+        available_cols = [col for col in OWID_COLUMNS if col in df.columns]
+        df_processed = df[available_cols]
         
-        available_cols = [col for col in relevant_cols if col in df.columns]
-        df_processed = df[available_cols].copy()
+        # Convert date column unless the loader already parsed it
+        if not pd.api.types.is_datetime64_any_dtype(df_processed['date']):
+            df_processed = df_processed.assign(
+                date=pd.to_datetime(df_processed['date'], format='%Y-%m-%d', cache=True)
+            )
         
         return df_processed
\ No newline at end of file
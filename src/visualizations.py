@@ -1,3 +1,5 @@
+import matplotlib
+matplotlib.use('Agg')  # Plots are only saved to file, never shown
 import matplotlib.pyplot as plt
 import seaborn as sns
 import pandas as pd
@@ -6,6 +8,22 @@ from datetime import datetime, timedelta
 import warnings
 warnings.filterwarnings('ignore')
 
+# Line series longer than this are decimated before plotting
+MAX_LINE_POINTS = 2000
+
+def _line_arrays(x, y, max_points=MAX_LINE_POINTS):
+    """Convert line data to NumPy arrays, keeping at most max_points evenly spaced vertices"""
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype('datetime64[D]')
+    
+    if len(x) <= max_points:
+        return x, y
+    # Evenly spaced indices that always include the first and last sample
+    idx = np.linspace(0, len(x) - 1, max_points).astype(np.intp)
+    return x[idx], y[idx]
+
 class COVIDVisualizations:
     def __init__(self):
         # Set style - handle different seaborn versions
@@ -40,8 +58,8 @@ class COVIDVisualizations:
         # Plot cumulative cases
         if 'confirmed' in available_types:
             confirmed_data = global_data[global_data['Type'] == 'confirmed']
-            axes[plot_idx].plot(confirmed_data['Date'], confirmed_data['confirmed'], 
-                              color=self.colors[0], linewidth=2)
+            axes[plot_idx].plot(*_line_arrays(confirmed_data['Date'], confirmed_data['confirmed']),
+                              color=self.colors[0], linewidth=2, rasterized=True)
             axes[plot_idx].set_title('Total Confirmed Cases')
             axes[plot_idx].set_ylabel('Cases')
             axes[plot_idx].tick_params(axis='x', rotation=45)
@@ -50,8 +68,8 @@ class COVIDVisualizations:
         # Plot cumulative deaths
         if 'deaths' in available_types:
             deaths_data = global_data[global_data['Type'] == 'deaths']
-            axes[plot_idx].plot(deaths_data['Date'], deaths_data['deaths'], 
-                              color=self.colors[1], linewidth=2)
+            axes[plot_idx].plot(*_line_arrays(deaths_data['Date'], deaths_data['deaths']),
+                              color=self.colors[1], linewidth=2, rasterized=True)
             axes[plot_idx].set_title('Total Deaths')
             axes[plot_idx].set_ylabel('Deaths')
             axes[plot_idx].tick_params(axis='x', rotation=45)
@@ -60,8 +78,8 @@ class COVIDVisualizations:
         # Plot recovered (if available)
         if 'recovered' in available_types and plot_idx < len(axes):
             recovered_data = global_data[global_data['Type'] == 'recovered']
-            axes[plot_idx].plot(recovered_data['Date'], recovered_data['recovered'], 
-                              color=self.colors[2], linewidth=2)
+            axes[plot_idx].plot(*_line_arrays(recovered_data['Date'], recovered_data['recovered']),
+                              color=self.colors[2], linewidth=2, rasterized=True)
             axes[plot_idx].set_title('Total Recovered')
             axes[plot_idx].set_ylabel('Recovered')
             axes[plot_idx].tick_params(axis='x', rotation=45)
@@ -78,8 +96,8 @@ class COVIDVisualizations:
                 cfr_data = cfr_data.dropna(subset=['CFR'])
                 
                 if len(cfr_data) > 0:
-                    axes[plot_idx].plot(cfr_data['Date'], cfr_data['CFR'], 
-                                      color=self.colors[3], linewidth=2)
+                    axes[plot_idx].plot(*_line_arrays(cfr_data['Date'], cfr_data['CFR']),
+                                      color=self.colors[3], linewidth=2, rasterized=True)
                     axes[plot_idx].set_title('Case Fatality Rate (%)')
                     axes[plot_idx].set_ylabel('CFR (%)')
                     axes[plot_idx].tick_params(axis='x', rotation=45)
@@ -93,16 +111,15 @@ class COVIDVisualizations:
         
         if save_path:
             plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        plt.show()
+        plt.close(fig)
     
     def plot_top_countries(self, processed_data, metric='confirmed', n=10, save_path=None):
         """Plot top N countries by specified metric"""
         fig, axes = plt.subplots(1, 2, figsize=(15, 6))
         
-        # Get latest data for each country
+        # Get latest data for each country (rows are ordered by country, then date)
         df = processed_data[metric]
-        latest_data = df.loc[df.groupby('Country/Region')['Date'].idxmax()]
-        top_countries = latest_data.nlargest(n, metric)
+        top_countries = df.groupby('Country/Region', sort=False, observed=True).tail(1).nlargest(n, metric)
         
         # Bar plot
         axes[0].barh(range(len(top_countries)), top_countries[metric], 
@@ -113,11 +130,13 @@ class COVIDVisualizations:
         axes[0].set_title(f'Top {n} Countries - {metric.capitalize()}')
         
         # Time series for top countries
-        top_country_names = top_countries['Country/Region'].tolist()
-        for i, country in enumerate(top_country_names[:5]):  # Show top 5 trends
-            country_data = df[df['Country/Region'] == country]
-            axes[1].plot(country_data['Date'], country_data[metric], 
-                        label=country, linewidth=2, color=self.colors[i])
+        top_country_names = top_countries['Country/Region'].tolist()[:5]  # Show top 5 trends
+        top_groups = dict(tuple(df[df['Country/Region'].isin(top_country_names)]
+                                .groupby('Country/Region', sort=False, observed=True)))
+        for i, country in enumerate(top_country_names):
+            country_data = top_groups[country]
+            axes[1].plot(*_line_arrays(country_data['Date'], country_data[metric]),
+                        label=country, linewidth=2, color=self.colors[i], rasterized=True)
         
         axes[1].set_xlabel('Date')
         axes[1].set_ylabel(f'{metric.capitalize()}')
@@ -129,7 +148,7 @@ class COVIDVisualizations:
         
         if save_path:
             plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        plt.show()
+        plt.close(fig)
     
     def plot_correlation_heatmap(self, owid_data, save_path=None):
         """Plot correlation heatmap of COVID-19 metrics"""
@@ -141,22 +160,27 @@ class COVIDVisualizations:
         numeric_cols = owid_data.select_dtypes(include=[np.number]).columns
         correlation_cols = [col for col in numeric_cols if 'cases' in col.lower() or 'deaths' in col.lower() or 'vaccin' in col.lower()]
         
+        # Drop all-NaN columns; corr() stays pairwise-complete over the rest
+        corr_input = owid_data[correlation_cols].dropna(axis=1, how='all')
+        correlation_cols = list(corr_input.columns)
+        
         if len(correlation_cols) < 2:
             print("Insufficient numeric columns for correlation analysis")
             return
         
-        corr_data = owid_data[correlation_cols].corr()
+        corr_data = corr_input.corr()
         
-        plt.figure(figsize=(12, 8))
-        mask = np.triu(np.ones_like(corr_data, dtype=bool))
-        sns.heatmap(corr_data, mask=mask, annot=True, cmap='coolwarm', center=0,
+        fig = plt.figure(figsize=(12, 8))
+        mask = np.zeros_like(corr_data, dtype=bool)
+        mask[np.triu_indices_from(mask)] = True
+        sns.heatmap(corr_data, mask=mask, annot=len(correlation_cols) <= 15, cmap='coolwarm', center=0,
                    square=True, fmt='.2f', cbar_kws={"shrink": .8})
         plt.title('COVID-19 Metrics Correlation Heatmap', fontsize=14, fontweight='bold')
         plt.tight_layout()
         
         if save_path:
             plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        plt.show()
+        plt.close(fig)
     
     def plot_vaccination_progress(self, owid_data, countries=None, save_path=None):
         """Plot vaccination progress for selected countries"""
@@ -168,13 +192,17 @@ class COVIDVisualizations:
             # Select top 10 countries by population
             countries = owid_data.groupby('location')['population'].max().nlargest(10).index.tolist()
         
-        plt.figure(figsize=(14, 8))
+        fig = plt.figure(figsize=(14, 8))
         
-        for i, country in enumerate(countries[:10]):
-            country_data = owid_data[owid_data['location'] == country].dropna(subset=['people_fully_vaccinated'])
-            if len(country_data) > 0:
-                plt.plot(country_data['date'], country_data['people_fully_vaccinated'], 
-                        label=country, linewidth=2, color=self.colors[i])
+        countries = countries[:10]
+        subset = owid_data[owid_data['location'].isin(countries)].dropna(subset=['people_fully_vaccinated'])
+        country_groups = dict(tuple(subset.groupby('location', sort=False)))
+        
+        for i, country in enumerate(countries):
+            country_data = country_groups.get(country)
+            if country_data is not None:
+                plt.plot(*_line_arrays(country_data['date'], country_data['people_fully_vaccinated']),
+                        label=country, linewidth=2, color=self.colors[i], rasterized=True)
         
         plt.xlabel('Date')
         plt.ylabel('People Fully Vaccinated')
@@ -185,28 +213,36 @@ class COVIDVisualizations:
         
         if save_path:
             plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        plt.show()
+        plt.close(fig)
     
-    def create_summary_dashboard(self, processed_data, owid_data=None, save_path=None):
+    def create_summary_dashboard(self, processed_data, owid_data=None, save_path=None,
+                                 global_by_date=None):
         """Create a comprehensive summary dashboard"""
+        # Global per-date totals are shared by the trend, CFR and summary panels
+        if global_by_date is None:
+            global_by_date = {
+                data_type: processed_data[data_type].groupby('Date')[data_type].sum()
+                for data_type in ('confirmed', 'deaths') if data_type in processed_data
+            }
+        global_confirmed = global_by_date.get('confirmed')
+        global_deaths = global_by_date.get('deaths')
+        
         fig = plt.figure(figsize=(20, 12))
         gs = fig.add_gridspec(3, 4, hspace=0.3, wspace=0.3)
         
         # Global trends
         ax1 = fig.add_subplot(gs[0, :2])
-        if 'confirmed' in processed_data:
-            global_confirmed = processed_data['confirmed'].groupby('Date')['confirmed'].sum()
-            ax1.plot(global_confirmed.index, global_confirmed.values, 
-                    color=self.colors[0], linewidth=3)
+        if global_confirmed is not None:
+            ax1.plot(*_line_arrays(global_confirmed.index, global_confirmed),
+                    color=self.colors[0], linewidth=3, rasterized=True)
             ax1.set_title('Global Confirmed Cases Over Time', fontweight='bold')
             ax1.set_ylabel('Confirmed Cases')
         
         # Global deaths
         ax2 = fig.add_subplot(gs[0, 2:])
-        if 'deaths' in processed_data:
-            global_deaths = processed_data['deaths'].groupby('Date')['deaths'].sum()
-            ax2.plot(global_deaths.index, global_deaths.values, 
-                    color=self.colors[1], linewidth=3)
+        if global_deaths is not None:
+            ax2.plot(*_line_arrays(global_deaths.index, global_deaths),
+                    color=self.colors[1], linewidth=3, rasterized=True)
             ax2.set_title('Global Deaths Over Time', fontweight='bold')
             ax2.set_ylabel('Deaths')
         
@@ -214,8 +250,7 @@ class COVIDVisualizations:
         ax3 = fig.add_subplot(gs[1, :2])
         if 'confirmed' in processed_data:
             df = processed_data['confirmed']
-            latest_data = df.loc[df.groupby('Country/Region')['Date'].idxmax()]
-            top_10 = latest_data.nlargest(10, 'confirmed')
+            top_10 = df.groupby('Country/Region', sort=False, observed=True).tail(1).nlargest(10, 'confirmed')
             ax3.barh(range(len(top_10)), top_10['confirmed'], color=self.colors[:len(top_10)])
             ax3.set_yticks(range(len(top_10)))
             ax3.set_yticklabels(top_10['Country/Region'])
@@ -225,8 +260,7 @@ class COVIDVisualizations:
         ax4 = fig.add_subplot(gs[1, 2:])
         if 'deaths' in processed_data:
             df = processed_data['deaths']
-            latest_data = df.loc[df.groupby('Country/Region')['Date'].idxmax()]
-            top_10 = latest_data.nlargest(10, 'deaths')
+            top_10 = df.groupby('Country/Region', sort=False, observed=True).tail(1).nlargest(10, 'deaths')
             ax4.barh(range(len(top_10)), top_10['deaths'], color=self.colors[:len(top_10)])
             ax4.set_yticks(range(len(top_10)))
             ax4.set_yticklabels(top_10['Country/Region'])
@@ -234,11 +268,9 @@ class COVIDVisualizations:
         
         # Case fatality rate over time
         ax5 = fig.add_subplot(gs[2, :2])
-        if 'confirmed' in processed_data and 'deaths' in processed_data:
-            global_conf = processed_data['confirmed'].groupby('Date')['confirmed'].sum()
-            global_deaths = processed_data['deaths'].groupby('Date')['deaths'].sum()
-            cfr = (global_deaths / global_conf * 100).fillna(0)
-            ax5.plot(cfr.index, cfr.values, color=self.colors[3], linewidth=2)
+        if global_confirmed is not None and global_deaths is not None:
+            cfr = (global_deaths / global_confirmed * 100).fillna(0)
+            ax5.plot(*_line_arrays(cfr.index, cfr), color=self.colors[3], linewidth=2, rasterized=True)
             ax5.set_title('Global Case Fatality Rate Over Time', fontweight='bold')
             ax5.set_ylabel('CFR (%)')
         
@@ -247,9 +279,9 @@ class COVIDVisualizations:
         ax6.axis('off')
         
         # Calculate summary stats
-        if 'confirmed' in processed_data and 'deaths' in processed_data:
-            total_cases = processed_data['confirmed'].groupby('Date')['confirmed'].sum().iloc[-1]
-            total_deaths = processed_data['deaths'].groupby('Date')['deaths'].sum().iloc[-1]
+        if global_confirmed is not None and global_deaths is not None:
+            total_cases = global_confirmed.iloc[-1]
+            total_deaths = global_deaths.iloc[-1]
             cfr = (total_deaths / total_cases * 100) if total_cases > 0 else 0
             
             summary_text = f"""
@@ -270,4 +302,4 @@ class COVIDVisualizations:
         
         if save_path:
             plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        plt.show()
\ No newline at end of file
+        plt.close(fig)
\ No newline at end of file